@@ -1,22 +1,149 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
+import sqlite3
 
 DATABASE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "rila.db")
 DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{DATABASE_PATH}"
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Sync engine: schema setup and the (single-threaded) research script
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=QueuePool,
+    pool_size=8,
+    max_overflow=16,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    connect_args={"check_same_thread": False, "timeout": 30},
+)
+
+# Async engine: API read endpoints, so queries don't tie up threadpool workers
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=8,
+    max_overflow=16,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    connect_args={"timeout": 30},
+)
+
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",  # readers don't block the research script's writes
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",  # 64 MB page cache per connection
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA foreign_keys=ON",
+)
+
+
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+# Compiled SQL is cached per engine (SQLAlchemy 2.x), so it is shared by every
+# session; sessions are cheap wrappers and loaded objects stay usable after commit
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, bind=async_engine)
 Base = declarative_base()
 
+# ROW_NUMBER() OVER (...) needs SQLite 3.25+; older builds dedupe in Python
+window_functions_enabled = sqlite3.sqlite_version_info >= (3, 25, 0)
 
-def get_db():
-    db = SessionLocal()
-    try:
+# Full-text index over attendee/company names (contentless; rowid = attendees.id)
+search_index_enabled = False
+
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    backfill_attendee_company_fields()
+    # create_all skips indexes on tables that already exist (e.g. the committed rila.db)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    # Refresh planner statistics so the indexes above are actually chosen
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    init_search_index()
+
+
+def add_missing_columns():
+    """ALTER existing tables to add model columns they lack (create_all never alters tables).
+
+    Returns {table name: [added column names]}.
+    """
+    inspector = inspect(engine)
+    added = {}
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                added.setdefault(table.name, []).append(column.name)
+    return added
+
+
+def backfill_attendee_company_fields():
+    """Copy company display fields onto attendees that don't have them yet.
+
+    Keyed on the data (company_name IS NULL) rather than on the columns having just
+    been added, so a run interrupted after the ALTERs is completed on the next start.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(
+            "UPDATE attendees SET "
+            + ", ".join(
+                f"company_{field} = (SELECT {field} FROM companies WHERE companies.id = attendees.company_id)"
+                for field in ("name", "dc_count", "truck_count", "hook", "category")
+            )
+            + " WHERE company_name IS NULL AND company_id IS NOT NULL"
+        ))
+
+
+def init_search_index():
+    """Create and populate the FTS5 search table. Leaves search on LIKE if FTS5 is missing."""
+    global search_index_enabled
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS attendee_search "
+                "USING fts5(first_name, last_name, company_name, content='')"
+            ))
+    except OperationalError:
+        search_index_enabled = False
+        return
+    search_index_enabled = True
+    rebuild_search_index()
+
+
+def rebuild_search_index():
+    """Reload the search table from attendees/companies (call after loading new rows)."""
+    if not search_index_enabled:
+        return
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO attendee_search(attendee_search) VALUES ('delete-all')"))
+        conn.execute(text(
+            "INSERT INTO attendee_search(rowid, first_name, last_name, company_name) "
+            "SELECT a.id, a.first_name, COALESCE(a.last_name, ''), c.name "
+            "FROM attendees a JOIN companies c ON c.id = a.company_id"
+        ))
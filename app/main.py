@@ -1,25 +1,37 @@
-from fastapi import FastAPI, Depends, Query, Form, Cookie
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, Depends, Query, Path, Form, Cookie, HTTPException
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy import Integer, bindparam, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.requests import Request
 import os
 import secrets
 import hashlib
+import hmac
+import time
+import orjson
 
+from . import database
 from .database import get_db, init_db
-from .models import Company, Attendee
+from .models import Company, Attendee, Meta, DATA_VERSION_KEY
 
-app = FastAPI(title="BGSA CEO Conference App")
+
+class ORJSONResponse(JSONResponse):
+    """JSON response encoded by orjson (C) instead of the stdlib json module."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+app = FastAPI(title="BGSA CEO Conference App", default_response_class=ORJSONResponse)
 
 # Simple auth config
 AUTH_USERNAME = "outpost"
 AUTH_PASSWORD = "zachiscool"
 SESSION_SECRET = os.getenv("SESSION_SECRET", secrets.token_hex(32))
 
-# Store active sessions (in production, use Redis or similar)
-active_sessions = set()
+SESSION_MAX_AGE = 86400  # seconds
 
 # Mount static files
 static_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")
@@ -30,14 +42,49 @@ templates_path = os.path.join(os.path.dirname(__file__), "templates")
 templates = Jinja2Templates(directory=templates_path)
 
 
-def create_session_token():
-    token = secrets.token_hex(32)
-    active_sessions.add(token)
-    return token
+SEARCH_MATCH_SQL = text(
+    "SELECT rowid FROM attendee_search WHERE attendee_search MATCH :q"
+).columns(rowid=Integer)
+
+
+def build_search_match(search: str) -> str:
+    """Turn user input into an FTS5 query: every word as a quoted prefix term.
+
+    Control characters are dropped (FTS5 rejects e.g. NUL inside a quoted term).
+    """
+    words = ("".join(ch for ch in tok if ch.isprintable()) for tok in search.split())
+    return " ".join('"{}"*'.format(word.replace('"', '""')) for word in words if word)
+
+
+def sign_session(user: str, exp: int) -> str:
+    return hmac.new(SESSION_SECRET.encode(), f"{user}|{exp}".encode(), hashlib.sha256).hexdigest()
+
+
+def create_session_token(user: str = AUTH_USERNAME) -> str:
+    """Stateless session token: "<expiry>.<HMAC of user|expiry>"."""
+    exp = int(time.time()) + SESSION_MAX_AGE
+    return f"{exp}.{sign_session(user, exp)}"
 
 
 def verify_session(session_token: str = Cookie(None)):
-    return session_token and session_token in active_sessions
+    if not session_token:
+        return False
+    exp, _, signature = session_token.partition(".")
+    # Client-supplied: ASCII digits of timestamp length only (else int() can raise)
+    if not (exp.isascii() and exp.isdigit() and len(exp) <= 12):
+        return False
+    # compare_digest raises TypeError on non-ASCII str
+    if not signature.isascii():
+        return False
+    if time.time() >= int(exp):
+        return False
+    return hmac.compare_digest(signature, sign_session(AUTH_USERNAME, int(exp)))
+
+
+def require_session(session_token: str = Cookie(None)):
+    """Route dependency: 401 before any other dependency (e.g. the DB session) is opened."""
+    if not verify_session(session_token):
+        raise HTTPException(status_code=401, detail="Unauthorized")
 
 
 @app.on_event("startup")
@@ -55,15 +102,13 @@ def login(username: str = Form(...), password: str = Form(...)):
     if username.lower() == AUTH_USERNAME.lower() and password == AUTH_PASSWORD:
         response = RedirectResponse(url="/", status_code=303)
         token = create_session_token()
-        response.set_cookie(key="session_token", value=token, httponly=True, max_age=86400)
+        response.set_cookie(key="session_token", value=token, httponly=True, max_age=SESSION_MAX_AGE)
         return response
     return RedirectResponse(url="/login?error=1", status_code=303)
 
 
 @app.get("/logout")
-def logout(session_token: str = Cookie(None)):
-    if session_token in active_sessions:
-        active_sessions.discard(session_token)
+def logout():
     response = RedirectResponse(url="/login", status_code=303)
     response.delete_cookie("session_token")
     return response
@@ -76,115 +121,196 @@ def home(request: Request, session_token: str = Cookie(None)):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
-@app.get("/api/prospects")
-def get_prospects(
-    filter: str = Query("all", pattern="^(all|gate|truck|other)$"),
-    search: str = Query(None),
-    limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
-    dedupe: bool = Query(True),
-    db: Session = Depends(get_db),
-    session_token: str = Cookie(None)
-):
-    if not verify_session(session_token):
-        return {"error": "Unauthorized"}
-
-    # Require 2+ characters for search (return empty if too short)
-    if search and len(search) < 2:
-        return []
-
-    query = db.query(Attendee).join(Company)
+def prospects_query(filter: str, search: str = None, dedupe: bool = True):
+    """Build the listing SELECT for a filter/search, deduped to one attendee per company.
 
-    # Apply filter
+    Reads only the attendees table (company display fields are denormalized onto it).
+    """
     if filter == "gate":
-        query = query.filter(Company.category.in_(["gate", "both"]))
-        query = query.order_by(Attendee.gate_fit_score.desc(), Attendee.id)
+        filters = [Attendee.company_category.in_(["gate", "both"])]
+        sort_keys = [Attendee.gate_fit_score.desc(), Attendee.id]
     elif filter == "truck":
-        query = query.filter(Company.category.in_(["truck", "both"]))
-        query = query.order_by(Attendee.truck_fit_score.desc(), Attendee.id)
+        filters = [Attendee.company_category.in_(["truck", "both"])]
+        sort_keys = [Attendee.truck_fit_score.desc(), Attendee.id]
     elif filter == "other":
-        query = query.filter(Company.category == "other")
-        query = query.order_by(Company.name, Attendee.id)
+        filters = [Attendee.company_category == "other"]
+        sort_keys = [Attendee.company_name, Attendee.id]
     else:
-        query = query.order_by(Attendee.combined_score.desc(), Attendee.id)
+        filters = []
+        sort_keys = [Attendee.combined_score.desc(), Attendee.id]
 
     # Apply search
-    if search:
+    if search and database.search_index_enabled:
+        filters.append(Attendee.id.in_(
+            SEARCH_MATCH_SQL.bindparams(q=build_search_match(search))
+        ))
+    elif search:
         search_term = f"%{search}%"
-        query = query.filter(
+        filters.append(
             (Attendee.first_name.ilike(search_term)) |
             (Attendee.last_name.ilike(search_term)) |
-            (Company.name.ilike(search_term))
+            (Attendee.company_name.ilike(search_term))
         )
 
-    attendees = query.all()
+    stmt = select(Attendee).where(*filters).order_by(*sort_keys)
 
     # Deduplicate: one attendee per company (keep first by score order)
-    # But show all attendees when searching (user wants to find specific people)
-    if dedupe and not search:
-        seen_companies = set()
-        deduped = []
-        for a in attendees:
-            if a.company_id not in seen_companies:
-                seen_companies.add(a.company_id)
-                deduped.append(a)
-        attendees = deduped
-
-    # Apply pagination after deduplication
-    total = len(attendees)
-    attendees = attendees[offset:offset + limit]
+    if dedupe and database.window_functions_enabled:
+        ranked = (
+            select(
+                Attendee.id,
+                func.row_number().over(
+                    partition_by=Attendee.company_id, order_by=sort_keys
+                ).label("rn"),
+            )
+            .where(*filters)
+            .subquery()
+        )
+        stmt = stmt.join(ranked, ranked.c.id == Attendee.id).where(ranked.c.rn == 1)
+
+    return stmt
+
+
+def dedupe_by_company(attendees: list) -> list:
+    """Keep the first attendee per company from a score-ordered list (no-window-function fallback)."""
+    seen = set()
+    seen_add = seen.add
+    deduped = []
+    keep = deduped.append
+    for a in attendees:
+        company_id = a.company_id
+        if company_id not in seen:
+            seen_add(company_id)
+            keep(a)
+    return deduped
 
+
+def prospect_summary(a: Attendee) -> dict:
     return {
-        "total": total,
-        "limit": limit,
-        "offset": offset,
-        "prospects": [
-            {
-                "id": a.id,
-                "name": a.full_name,
-                "company_name": a.company.name,
-                "job_title": a.job_title,
-                "dc_count": a.company.dc_count,
-                "truck_count": a.company.truck_count,
-                "gate_fit_score": a.gate_fit_score,
-                "truck_fit_score": a.truck_fit_score,
-                "hook": a.company.hook,
-                "category": a.company.category,
-                "ticket_type": a.ticket_type,
-            }
-            for a in attendees
-        ]
+        "id": a.id,
+        "name": a.full_name,
+        "company_name": a.company_name,
+        "job_title": a.job_title,
+        "dc_count": a.company_dc_count,
+        "truck_count": a.company_truck_count,
+        "gate_fit_score": a.gate_fit_score,
+        "truck_fit_score": a.truck_fit_score,
+        "hook": a.company_hook,
+        "category": a.company_category,
+        "ticket_type": a.ticket_type,
     }
 
 
-@app.get("/api/prospects/{prospect_id}")
-def get_prospect(prospect_id: int, db: Session = Depends(get_db), session_token: str = Cookie(None)):
-    if not verify_session(session_token):
-        return {"error": "Unauthorized"}
+# Built listings per (filter, dedupe): {key: (data_version, [prospect dicts])}.
+# The data only changes when the research script runs, and it bumps data_version.
+prospects_cache = {}
+
+
+async def cached_prospects(db: AsyncSession, filter: str, dedupe: bool) -> list:
+    version = await db.scalar(select(Meta.value).where(Meta.key == DATA_VERSION_KEY)) or 0
+    cached = prospects_cache.get((filter, dedupe))
+    if cached and cached[0] == version:
+        return cached[1]
 
-    attendee = db.query(Attendee).join(Company).filter(Attendee.id == prospect_id).first()
+    attendees = (await db.scalars(prospects_query(filter, dedupe=dedupe))).all()
+    if dedupe and not database.window_functions_enabled:
+        attendees = dedupe_by_company(attendees)
+    prospects = [prospect_summary(a) for a in attendees]
+    prospects_cache[(filter, dedupe)] = (version, prospects)
+    return prospects
+
+
+@app.get("/api/prospects", dependencies=[Depends(require_session)])
+async def get_prospects(
+    filter: str = Query("all", pattern="^(all|gate|truck|other)$"),
+    search: str = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    dedupe: bool = Query(True),
+    db: AsyncSession = Depends(get_db),
+):
+    # Require 2+ characters for search (return empty if too short)
+    if search and len(search) < 2:
+        return []
+
+    if search and database.search_index_enabled and not build_search_match(search):
+        # No usable FTS terms (whitespace/control characters only; an empty MATCH is a syntax error)
+        total = 0
+        page = []
+    elif search:
+        # Show all attendees when searching (user wants to find specific people)
+        stmt = prospects_query(filter, search, dedupe=False)
+        total = await db.scalar(
+            stmt.with_only_columns(func.count(Attendee.id)).order_by(None)
+        )
+        attendees = (await db.scalars(stmt.offset(offset).limit(limit))).all()
+        page = [prospect_summary(a) for a in attendees]
+    else:
+        prospects = await cached_prospects(db, filter, dedupe)
+        total = len(prospects)
+        page = prospects[offset:offset + limit]
+
+    # Returned as a response (not a dict) so FastAPI skips the jsonable_encoder walk
+    return ORJSONResponse({
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "prospects": page,
+    })
+
+
+# Detail row as plain columns (no ORM instances); built once, bound per request
+PROSPECT_DETAIL_STMT = (
+    select(
+        Attendee.id,
+        Attendee.first_name,
+        Attendee.last_name,
+        Attendee.job_title,
+        Attendee.gate_fit_score,
+        Attendee.truck_fit_score,
+        Attendee.email,
+        Attendee.linkedin_url,
+        Attendee.ticket_type,
+        Attendee.job_function,
+        Attendee.management_level,
+        Company.name.label("company_name"),
+        Company.overview,
+        Company.dc_count,
+        Company.truck_count,
+        Company.category,
+        Company.hook,
+        Company.company_bullets,
+    )
+    .join(Attendee.company)
+    .where(Attendee.id == bindparam("pid"))
+)
+
+
+@app.get("/api/prospects/{prospect_id}", dependencies=[Depends(require_session)])
+async def get_prospect(prospect_id: int = Path(..., ge=1), db: AsyncSession = Depends(get_db)):
+    attendee = (await db.execute(PROSPECT_DETAIL_STMT, {"pid": prospect_id})).mappings().first()
 
     if not attendee:
         return {"error": "Not found"}
 
-    return {
-        "id": attendee.id,
-        "name": attendee.full_name,
-        "company_name": attendee.company.name,
-        "job_title": attendee.job_title,
+    return ORJSONResponse({
+        "id": attendee["id"],
+        "name": f"{attendee['first_name']} {attendee['last_name']}".strip(),
+        "company_name": attendee["company_name"],
+        "job_title": attendee["job_title"],
         # Company data
-        "company_overview": attendee.company.overview,
-        "dc_count": attendee.company.dc_count,
-        "truck_count": attendee.company.truck_count,
-        "gate_fit_score": attendee.gate_fit_score,
-        "truck_fit_score": attendee.truck_fit_score,
-        "category": attendee.company.category,
-        "hook": attendee.company.hook,
-        "company_bullets": attendee.company.company_bullets or [],
+        "company_overview": attendee["overview"],
+        "dc_count": attendee["dc_count"],
+        "truck_count": attendee["truck_count"],
+        "gate_fit_score": attendee["gate_fit_score"],
+        "truck_fit_score": attendee["truck_fit_score"],
+        "category": attendee["category"],
+        "hook": attendee["hook"],
+        "company_bullets": attendee["company_bullets"] or [],
         # CSV metadata
-        "email": attendee.email,
-        "linkedin_url": attendee.linkedin_url,
-        "ticket_type": attendee.ticket_type,
-        "job_function": attendee.job_function,
-        "management_level": attendee.management_level,
-    }
+        "email": attendee["email"],
+        "linkedin_url": attendee["linkedin_url"],
+        "ticket_type": attendee["ticket_type"],
+        "job_function": attendee["job_function"],
+        "management_level": attendee["management_level"],
+    })
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -38,6 +38,10 @@ class Company(Base):
 
     attendees = relationship("Attendee", back_populates="company")
 
+    __table_args__ = (
+        Index("ix_companies_category", category),
+    )
+
 
 class Attendee(Base):
     __tablename__ = "attendees"
@@ -64,10 +68,40 @@ class Attendee(Base):
     truck_fit_score = Column(Integer, default=0)
     combined_score = Column(Integer, default=0)
 
+    # Company display fields (denormalized so the listing needs no join)
+    company_name = Column(String)
+    company_dc_count = Column(Integer, default=0)
+    company_truck_count = Column(Integer, default=0)
+    company_hook = Column(Text)
+    company_category = Column(String, default="other")
+
     created_at = Column(DateTime, server_default=func.now())
 
     company = relationship("Company", back_populates="attendees")
 
+    # Sort indexes for the listing; the company_* ones rank attendees within a
+    # company for the one-attendee-per-company listing (and cover company_id lookups)
+    __table_args__ = (
+        Index("ix_attendees_combined", combined_score.desc(), id),
+        Index("ix_attendees_gate", gate_fit_score.desc(), id),
+        Index("ix_attendees_truck", truck_fit_score.desc(), id),
+        Index("ix_attendees_company_category", company_category),
+        Index("ix_attendees_company_combined", company_id, combined_score.desc(), id),
+        Index("ix_attendees_company_gate", company_id, gate_fit_score.desc(), id),
+        Index("ix_attendees_company_truck", company_id, truck_fit_score.desc(), id),
+    )
+
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}".strip()
+
+
+# meta key bumped by the research script whenever companies/attendees change
+DATA_VERSION_KEY = "data_version"
+
+
+class Meta(Base):
+    __tablename__ = "meta"
+
+    key = Column(String, primary_key=True)
+    value = Column(Integer, default=0)
@@ -7,15 +7,19 @@ Usage:
     python scripts/research_companies.py              # Run all
     python scripts/research_companies.py --limit 3    # Test with 3 companies
     python scripts/research_companies.py --load-only  # Just load CSV, no research
+    python scripts/research_companies.py --concurrency 10  # More research calls in flight
 """
 
 import argparse
+import asyncio
 import csv
 import json
 import os
 import re
+import string
 import sys
 import time
+from contextlib import contextmanager
 from datetime import datetime, timezone
 
 # Add parent directory to path for imports
@@ -25,16 +29,23 @@ from dotenv import load_dotenv
 from google import genai
 from google.genai import types
 
-from app.database import SessionLocal, init_db
-from app.models import Company, Attendee
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.database import SessionLocal, engine, init_db, rebuild_search_index
+from app.models import Company, Attendee, Meta, DATA_VERSION_KEY
 
 load_dotenv()
 
 # Initialize Gemini client
 client = genai.Client()
 
-# Rate limiting
+# Rate limiting: minimum spacing between call starts, shared by all concurrent calls
 DELAY_BETWEEN_CALLS = 1.5  # seconds
+CONCURRENCY = 5  # research calls in flight at once
+
+# Attendee rows per executemany during the CSV load
+INSERT_BATCH_SIZE = 500
 
 # CSV file path
 CSV_FILENAME = "2026-01 RILA LINK 2026 Attendee List (Clay and ZoomInfo Enriched) - RILA LINK 2026 Attendees.csv"
@@ -77,17 +88,40 @@ For BULLETS - include source in parentheses:
 
 Return ONLY valid JSON, no markdown formatting."""
 
+# COMPANY_RESEARCH_PROMPT split once into (literal text, field name) pairs ({{ }} already unescaped)
+_PROMPT_PARTS = [
+    (literal, field_name)
+    for literal, field_name, _, _ in string.Formatter().parse(COMPANY_RESEARCH_PROMPT)
+]
+
+
+def build_research_prompt(**fields) -> str:
+    """Equivalent to COMPANY_RESEARCH_PROMPT.format(**fields) without re-parsing the template."""
+    return "".join(
+        literal + (str(fields[field_name]) if field_name is not None else "")
+        for literal, field_name in _PROMPT_PARTS
+    )
+
+
+# Markdown code fences around JSON responses
+_FENCE_RE = re.compile(r'```(?:json)?\s*(\{.*?\})\s*```', re.DOTALL)
+_PREFIX_RE = re.compile(r'^```\w*\n?')
+_SUFFIX_RE = re.compile(r'\n?```$')
+
 
 def parse_json_response(text: str) -> dict:
     """Extract JSON from response text, handling markdown code blocks."""
-    json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', text, re.DOTALL)
+    if '```' not in text:
+        return json.loads(text)
+
+    json_match = _FENCE_RE.search(text)
     if json_match:
         text = json_match.group(1)
 
     text = text.strip()
     if text.startswith('```'):
-        text = re.sub(r'^```\w*\n?', '', text)
-        text = re.sub(r'\n?```$', '', text)
+        text = _PREFIX_RE.sub('', text)
+        text = _SUFFIX_RE.sub('', text)
 
     return json.loads(text)
 
@@ -107,7 +141,7 @@ def safe_int(value, default=0):
         return default
 
 
-def research_company(company_name: str, industry: str, num_locations: int, employees: int, website: str) -> dict:
+async def research_company(company_name: str, industry: str, num_locations: int, employees: int, website: str) -> dict:
     """Research a single company using Gemini with Google Search grounding."""
     grounding_tool = types.Tool(google_search=types.GoogleSearch())
 
@@ -116,7 +150,7 @@ def research_company(company_name: str, industry: str, num_locations: int, emplo
         thinking_config=types.ThinkingConfig(thinking_level="low")
     )
 
-    prompt = COMPANY_RESEARCH_PROMPT.format(
+    prompt = build_research_prompt(
         company_name=company_name,
         industry=industry or "Unknown",
         num_locations=num_locations or "Unknown",
@@ -124,7 +158,7 @@ def research_company(company_name: str, industry: str, num_locations: int, emplo
         website=website or "Unknown"
     )
 
-    response = client.models.generate_content(
+    response = await client.aio.models.generate_content(
         model="gemini-3-flash-preview",
         contents=prompt,
         config=config,
@@ -133,6 +167,22 @@ def research_company(company_name: str, industry: str, num_locations: int, emplo
     return parse_json_response(response.text)
 
 
+class RateLimiter:
+    """Space out call starts by at least `interval` seconds across concurrent tasks."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def wait(self):
+        async with self._lock:
+            delay = self._next_start - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_start = time.monotonic() + self.interval
+
+
 def calculate_combined_score(gate_score: int, truck_score: int) -> int:
     """Calculate combined score with bonus for dual fit."""
     base = max(gate_score, truck_score)
@@ -152,18 +202,143 @@ def assign_category(gate_score: int, truck_score: int) -> str:
         return "other"
 
 
-def load_csv_data(csv_path: str) -> list:
-    """Load and parse CSV data."""
+def bump_data_version(db):
+    """Mark company/attendee data as changed so the API drops its cached listings.
+
+    Works with either a Session or a Core connection; commits with the caller's transaction.
+    """
+    db.execute(
+        sqlite_insert(Meta)
+        .values(key=DATA_VERSION_KEY, value=1)
+        .on_conflict_do_update(index_elements=[Meta.key], set_={'value': Meta.value + 1})
+    )
+
+
+@contextmanager
+def bulk_load_connection():
+    """Core connection for the CSV load: one transaction, fsync off until it commits."""
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        conn.commit()
+        try:
+            with conn.begin():
+                yield conn
+        finally:
+            conn.exec_driver_sql("PRAGMA synchronous=NORMAL")
+            conn.commit()
+
+
+def load_csv_data(csv_path: str):
+    """Stream CSV data: yields the header row, then each data row, as plain lists."""
     with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        return list(reader)
+        yield from csv.reader(f)
+
+
+def csv_column(header: list, *names: str):
+    """Return a row -> value getter for the first non-empty of the named columns.
+
+    Indices are resolved once from the header. Like DictReader, a repeated
+    column name reads its last occurrence; missing columns, and fields past
+    the end of a short row, read as ''.
+    """
+    positions = {name: i for i, name in enumerate(header)}
+    indices = [positions[name] for name in names if name in positions]
+
+    def get(row):
+        for i in indices:
+            if i < len(row) and row[i]:
+                return row[i]
+        return ''
+
+    return get
+
+
+def save_research(db, company: Company, research: dict):
+    """Store research results on the company and copy its scores to its attendees."""
+    gate_score = research.get('gate_fit_score', 0)
+    truck_score = research.get('truck_fit_score', 0)
+
+    company.overview = research.get('overview', '')
+    company.dc_count = research.get('dc_count', 0)
+    company.truck_count = research.get('truck_count', 0)
+    company.company_bullets = research.get('company_bullets', [])
+    company.hook = research.get('hook', '')
+    company.gate_fit_score = gate_score
+    company.truck_fit_score = truck_score
+    company.combined_score = calculate_combined_score(gate_score, truck_score)
+    company.category = assign_category(gate_score, truck_score)
+    company.researched_at = datetime.now(timezone.utc)
+
+    # Update all attendees at this company with scores and display fields
+    db.execute(
+        update(Attendee)
+        .where(Attendee.company_id == company.id)
+        .values(
+            gate_fit_score=gate_score,
+            truck_fit_score=truck_score,
+            combined_score=company.combined_score,
+            company_name=company.name,
+            company_dc_count=company.dc_count,
+            company_truck_count=company.truck_count,
+            company_hook=company.hook,
+            company_category=company.category,
+        )
+    )
+
+    bump_data_version(db)
+    db.commit()
+
+
+async def research_companies(db, companies: list, concurrency: int):
+    """Research companies concurrently (bounded and rate limited), saving each as it finishes.
+
+    Saves run synchronously between awaits on the single event loop, so each
+    company's write + commit never interleaves with another's.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    rate_limiter = RateLimiter(DELAY_BETWEEN_CALLS)
+    done = 0
+
+    async def research_one(company: Company):
+        nonlocal done
+        async with semaphore:
+            await rate_limiter.wait()
+            name = company.name
+            try:
+                research = await research_company(
+                    name,
+                    company.primary_industry,
+                    company.num_locations,
+                    company.employees,
+                    company.website
+                )
+                save_research(db, company, research)
+                error = None
+            except Exception as e:
+                db.rollback()
+                error = e
+
+        done += 1
+        print(f"\n[{done}/{len(companies)}] Researched: {name}")
+        if error:
+            print(f"  ✗ Error: {error}")
+            return
+        print(f"  ✓ DCs: {company.dc_count}, Trucks: {company.truck_count}")
+        print(f"  ✓ Gate: {company.gate_fit_score}, Truck: {company.truck_fit_score}, Category: {company.category}")
+        if company.company_bullets:
+            print(f"  ✓ {len(company.company_bullets)} bullets")
+
+    await asyncio.gather(*(research_one(c) for c in companies))
 
 
 def main():
     parser = argparse.ArgumentParser(description="Research RILA LINK 2026 attendee companies")
     parser.add_argument("--limit", type=int, default=0, help="Limit number of companies to research (0 = all)")
     parser.add_argument("--load-only", action="store_true", help="Only load CSV data, skip research")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Research calls in flight at once")
     args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
 
     # Initialize database
     init_db()
@@ -171,104 +346,159 @@ def main():
 
     # Load CSV
     csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", CSV_FILENAME)
-    attendees_data = load_csv_data(csv_path)
-    print(f"Loaded {len(attendees_data)} attendees from CSV")
-
-    # Build company info from CSV (aggregate from all attendees at each company)
+    rows = load_csv_data(csv_path)
+    header = next(rows, [])
+
+    company_col = csv_column(header, 'Company')
+    first_name_col = csv_column(header, 'First Name')
+    last_name_col = csv_column(header, 'Last Name')
+    full_name_col = csv_column(header, 'Full Name')
+    website_col = csv_column(header, 'Website', 'Domain')
+    industry_col = csv_column(header, 'Primary Industry')
+    locations_col = csv_column(header, 'Number of Locations')
+    employees_col = csv_column(header, 'Employees')
+    revenue_col = csv_column(header, 'Revenue Range (in USD)', 'Revenue (in 000s USD)')
+    job_title_col = csv_column(header, 'Job Title', 'Title')
+    job_function_col = csv_column(header, 'Job Function')
+    management_level_col = csv_column(header, 'Management Level')
+    ticket_type_col = csv_column(header, 'Ticket Type')
+    email_col = csv_column(header, 'Work Email', 'Email Address')
+    linkedin_col = csv_column(header, 'LinkedIn Contact Profile URL', 'Linked In Profile URL')
+    rep_col = csv_column(header, 'Rep')
+
+    # Single streaming pass: company info (from the first attendee at each company)
+    # + the attendee fields we keep; full CSV rows are never held in memory
     companies_from_csv = {}
-    for row in attendees_data:
-        company_name = row.get('Company', '').strip()
+    attendees_from_csv = []
+    row_count = 0
+    for row in rows:
+        if not row:  # blank line (DictReader skips these too)
+            continue
+        row_count += 1
+        company_name = company_col(row).strip()
         if not company_name:
             continue
 
         if company_name not in companies_from_csv:
             companies_from_csv[company_name] = {
                 'name': company_name,
-                'website': row.get('Website', '') or row.get('Domain', ''),
-                'primary_industry': row.get('Primary Industry', ''),
-                'num_locations': safe_int(row.get('Number of Locations', 0)),
-                'employees': safe_int(row.get('Employees', 0)),
-                'revenue': row.get('Revenue Range (in USD)', '') or row.get('Revenue (in 000s USD)', ''),
+                'website': website_col(row),
+                'primary_industry': industry_col(row),
+                'num_locations': safe_int(locations_col(row)),
+                'employees': safe_int(employees_col(row)),
+                'revenue': revenue_col(row),
             }
 
-    print(f"Found {len(companies_from_csv)} unique companies")
-
-    # Get existing companies from database
-    existing_companies = {c.name: c for c in db.query(Company).all()}
-    print(f"Already in database: {len(existing_companies)}")
-
-    # Create or update companies from CSV data
-    for company_name, csv_data in companies_from_csv.items():
-        if company_name not in existing_companies:
-            company = Company(
-                name=company_name,
-                website=csv_data['website'],
-                primary_industry=csv_data['primary_industry'],
-                num_locations=csv_data['num_locations'],
-                employees=csv_data['employees'],
-                revenue=str(csv_data['revenue']) if csv_data['revenue'] else None,
-            )
-            db.add(company)
-            existing_companies[company_name] = company
-
-    db.commit()
-    print(f"Companies in database: {len(existing_companies)}")
-
-    # Load attendees from CSV
-    print(f"\nLoading attendees...")
-    existing_attendees = {}
-    for a in db.query(Attendee).join(Company).all():
-        key = (a.first_name, a.last_name, a.company.name)
-        existing_attendees[key] = a
-
-    attendees_added = 0
-    for row in attendees_data:
-        company_name = row.get('Company', '').strip()
-        first_name = row.get('First Name', '').strip()
-        last_name = row.get('Last Name', '').strip()
+        first_name = first_name_col(row).strip()
+        last_name = last_name_col(row).strip()
 
         # If First Name is empty, try to parse from Full Name
         if not first_name:
-            full_name = row.get('Full Name', '').strip()
+            full_name = full_name_col(row).strip()
             if full_name:
                 parts = full_name.split(None, 1)  # Split on first whitespace
                 first_name = parts[0] if parts else ''
                 if len(parts) > 1 and not last_name:
                     last_name = parts[1]
 
-        if not company_name or not first_name:
+        if not first_name:
             continue
 
-        key = (first_name, last_name, company_name)
-        if key in existing_attendees:
-            continue
+        attendees_from_csv.append((company_name, {
+            'first_name': first_name,
+            'last_name': last_name,
+            'job_title': job_title_col(row),
+            'job_function': job_function_col(row),
+            'management_level': management_level_col(row),
+            'ticket_type': ticket_type_col(row),
+            'email': email_col(row),
+            'linkedin_url': linkedin_col(row),
+            'rep': rep_col(row),
+        }))
+
+    print(f"Loaded {row_count} attendees from CSV")
+    print(f"Found {len(companies_from_csv)} unique companies")
 
-        company = existing_companies.get(company_name)
-        if not company:
-            continue
+    with bulk_load_connection() as conn:
+        # Get existing companies from database
+        existing_names = set(conn.scalars(select(Company.name)))
+        print(f"Already in database: {len(existing_names)}")
 
-        attendee = Attendee(
-            first_name=first_name,
-            last_name=last_name,
-            company_id=company.id,
-            job_title=row.get('Job Title', '') or row.get('Title', ''),
-            job_function=row.get('Job Function', ''),
-            management_level=row.get('Management Level', ''),
-            ticket_type=row.get('Ticket Type', ''),
-            email=row.get('Work Email', '') or row.get('Email Address', ''),
-            linkedin_url=row.get('LinkedIn Contact Profile URL', '') or row.get('Linked In Profile URL', ''),
-            rep=row.get('Rep', ''),
-            gate_fit_score=company.gate_fit_score,
-            truck_fit_score=company.truck_fit_score,
-            combined_score=company.combined_score,
-        )
-        db.add(attendee)
-        existing_attendees[key] = attendee
-        attendees_added += 1
+        # Create companies from CSV data (one executemany)
+        new_companies = [
+            {
+                'name': company_name,
+                'website': csv_data['website'],
+                'primary_industry': csv_data['primary_industry'],
+                'num_locations': csv_data['num_locations'],
+                'employees': csv_data['employees'],
+                'revenue': str(csv_data['revenue']) if csv_data['revenue'] else None,
+            }
+            for company_name, csv_data in companies_from_csv.items()
+            if company_name not in existing_names
+        ]
+        if new_companies:
+            conn.execute(insert(Company), new_companies)
+
+        existing_companies = {
+            c.name: c for c in conn.execute(select(
+                Company.id, Company.name,
+                Company.gate_fit_score, Company.truck_fit_score, Company.combined_score,
+                Company.dc_count, Company.truck_count, Company.hook, Company.category,
+            ))
+        }
+        print(f"Companies in database: {len(existing_companies)}")
+
+        # Load attendees from CSV
+        print(f"\nLoading attendees...")
+        existing_attendees = {
+            tuple(key) for key in conn.execute(
+                select(Attendee.first_name, Attendee.last_name, Company.name).join(Attendee.company)
+            )
+        }
+
+        attendee_rows = []
+        attendees_added = 0
+        for company_name, attendee in attendees_from_csv:
+            key = (attendee['first_name'], attendee['last_name'], company_name)
+            if key in existing_attendees:
+                continue
+
+            company = existing_companies.get(company_name)
+            if not company:
+                continue
+
+            attendee_rows.append({
+                **attendee,
+                'company_id': company.id,
+                'gate_fit_score': company.gate_fit_score,
+                'truck_fit_score': company.truck_fit_score,
+                'combined_score': company.combined_score,
+                'company_name': company.name,
+                'company_dc_count': company.dc_count,
+                'company_truck_count': company.truck_count,
+                'company_hook': company.hook,
+                'company_category': company.category,
+            })
+            existing_attendees.add(key)
+
+            if len(attendee_rows) >= INSERT_BATCH_SIZE:
+                conn.execute(insert(Attendee), attendee_rows)
+                attendees_added += len(attendee_rows)
+                attendee_rows = []
+
+        if attendee_rows:
+            conn.execute(insert(Attendee), attendee_rows)
+            attendees_added += len(attendee_rows)
+
+        if new_companies or attendees_added:
+            bump_data_version(conn)
 
-    db.commit()
     print(f"Added {attendees_added} new attendees")
 
+    if attendees_added:
+        rebuild_search_index()
+
     if args.load_only:
         print("\n--load-only specified, skipping research")
         db.close()
@@ -285,50 +515,7 @@ def main():
         companies_to_research = companies_to_research[:args.limit]
         print(f"Limited to: {len(companies_to_research)} companies")
 
-    for i, company in enumerate(companies_to_research):
-        print(f"\n[{i+1}/{len(companies_to_research)}] Researching: {company.name}")
-
-        try:
-            research = research_company(
-                company.name,
-                company.primary_industry,
-                company.num_locations,
-                company.employees,
-                company.website
-            )
-
-            gate_score = research.get('gate_fit_score', 0)
-            truck_score = research.get('truck_fit_score', 0)
-
-            company.overview = research.get('overview', '')
-            company.dc_count = research.get('dc_count', 0)
-            company.truck_count = research.get('truck_count', 0)
-            company.company_bullets = research.get('company_bullets', [])
-            company.hook = research.get('hook', '')
-            company.gate_fit_score = gate_score
-            company.truck_fit_score = truck_score
-            company.combined_score = calculate_combined_score(gate_score, truck_score)
-            company.category = assign_category(gate_score, truck_score)
-            company.researched_at = datetime.now(timezone.utc)
-
-            # Update all attendees at this company with scores
-            for attendee in company.attendees:
-                attendee.gate_fit_score = gate_score
-                attendee.truck_fit_score = truck_score
-                attendee.combined_score = company.combined_score
-
-            db.commit()
-
-            print(f"  ✓ DCs: {company.dc_count}, Trucks: {company.truck_count}")
-            print(f"  ✓ Gate: {gate_score}, Truck: {truck_score}, Category: {company.category}")
-            if company.company_bullets:
-                print(f"  ✓ {len(company.company_bullets)} bullets")
-
-        except Exception as e:
-            print(f"  ✗ Error: {e}")
-            db.rollback()
-
-        time.sleep(DELAY_BETWEEN_CALLS)
+    asyncio.run(research_companies(db, companies_to_research, args.concurrency))
 
     # Summary
     total_companies = db.query(Company).count()